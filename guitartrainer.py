@@ -23,14 +23,18 @@
 
 import pyaudio
 import numpy as np
+import numba
 import Tkinter
 from Tkinter import Listbox, Label, Radiobutton, Spinbox, DoubleVar, IntVar, Scrollbar
 import tkFont
 import random
 from threading import Thread
+from Queue import Queue
+import os
 import sched
 import time
-from collections import deque
+from collections import deque, Counter
+from itertools import islice
 
 """The sampling frequency is the typical standard 44100.  The sample size was chosen to
 to be able to reliably distinguish the closely spaced (in terms of frequency) notes on the
@@ -39,9 +43,14 @@ processed per second with modest computer hardware"""
 SAMPLING_FREQ = 44100
 SAMPLE_SIZE = 2 ** 14
 
-"""These midi min and max values are used to set the fft bin range to match the frequency range
-of a 6-string guitar that is using standard tuning.  Frequencies above and below the fft bins are ignored.
-This acts like a bandpass filter."""
+"""Audio is read HOP_SIZE samples at a time and the notes are looked for in the last SAMPLE_SIZE samples
+after every read, so neighbouring frames overlap.  A note is heard about 4x sooner than if we waited for
+a whole new sample each time."""
+HOP_SIZE = 2 ** 12
+
+"""These midi min and max values are used to set the range of the goertzel filter bank to match the frequency range
+of a 6-string guitar that is using standard tuning.  There is one filter per midi note, so frequencies above and
+below the filter bank are ignored.  This acts like a bandpass filter."""
 MIDI_MIN = 40  # E2
 MIDI_MAX = 76  # E5 - decided to ignore frets above 12 on the high E because having trouble capturing.  Will revisit
 
@@ -54,6 +63,33 @@ THRESHOLD_MULTIPLIER_DEFAULT = 1.3
 
 ADD_NOTES_INCREMENT_DEFAULT = 10
 
+"""The ledger lines above and below the staff, each with the staff location from which on a note needs it.  For
+instance a note at staff location 12 (A4) or higher needs the lowest of the ledger lines above the staff, and a
+note at 0 (guitar middle-C) or lower needs the highest of the ones below."""
+LEDGERS_ABOVE = ((12, (85, 50, 115, 50)), (14, (85, 40, 115, 40)), (16, (85, 30, 115, 30)), (18, (85, 20, 115, 20)))
+LEDGERS_BELOW = ((0, (85, 110, 115, 110)), (-2, (85, 120, 115, 120)), (-4, (85, 130, 115, 130)))
+
+
+# typed signature so numba compiles (or loads from its cache) at import, not on the first captured audio frame
+@numba.njit('void(int16[::1], float32[::1], float32[::1], float32[::1])', cache=True, fastmath=True, parallel=True)
+def goertzel_bank(samples, window, coeffs, out):
+    """Runs one goertzel filter per candidate note over the windowed samples and writes the power
+    (squared magnitude) of each filter to out.  This is much less work than a full fft since we only care
+    about ~37 frequencies.  Every filter looks at the whole buffer.  Shorter filters for the higher notes would
+    see the attack of a note before the low ones do, and a harmonic of the note could win the argmax while the
+    note is starting (e.g. a plucked E2 heard as E3).  The raw int16 samples are cast and windowed inside the loop
+    so no windowed copy of the buffer is ever written out."""
+    n_samples = samples.shape[0]
+    for k in numba.prange(coeffs.shape[0]):
+        c = np.float64(coeffs[k])  # keep the running sums in float64, a serial recurrence gains nothing from float32
+        s1 = 0.0
+        s2 = 0.0
+        for n in range(n_samples):
+            s = samples[n] * window[n] + c * s1 - s2
+            s2 = s1
+            s1 = s
+        out[k] = (s1 * s1 + s2 * s2 - c * s1 * s2) / (n_samples * n_samples)
+
 
 class Note(object):
     """
@@ -61,15 +97,15 @@ class Note(object):
     location (i.e. number of 0.5 staff lines relative to guitar middle-C).  The class uses a scale with A = 440Hz.
     """
 
-    __slots__ = ['_midi', '_name', '_staff_loc']
+    __slots__ = ['_midi', '_name', '_staff_loc', '_freq', '_accidental']
 
     def __init__(self, midi, name, staff_loc):
-        if midi >= MIDI_MIN or midi <= MIDI_MAX:
-            self._midi = midi
-            self._name = name
-            self._staff_loc = staff_loc
-        else:
-            raise ValueError
+        assert MIDI_MIN <= midi <= MIDI_MAX  # the notes all come from the topics table, so this is only a sanity check
+        self._midi = midi
+        self._name = name
+        self._staff_loc = staff_loc
+        self._freq = Note.midi_to_freq(midi)
+        self._accidental = name[1:]  # '#', 'b' or '' for a natural note
 
     @property
     def midi(self):
@@ -79,6 +115,10 @@ class Note(object):
     def name(self):
         return self._name
 
+    @property
+    def accidental(self):
+        return self._accidental
+
     @property
     def staff_loc(self):
         """ Distance (in 1/2 staff lines) from "guitar middle-C"
@@ -88,7 +128,7 @@ class Note(object):
 
     @property
     def freq(self):
-        return Note.midi_to_freq(self._midi)
+        return self._freq
 
     @staticmethod
     def midi_to_freq(midi):
@@ -107,21 +147,31 @@ class Note(object):
         return self.name + ", " + str(self._midi)
 
     def __eq__(self, other):
-        return self._midi == other.midi and self._name == other.name and self._staff_loc == other.staff_loc
+        """ the midi value alone identifies a note within a topic """
+        return type(other) is Note and self._midi == other._midi
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __hash__(self):
+        return self._midi
 
 
 class Topic(object):
     """ This class represent a 'learning unit'.  For instance
     B String Notes could be a topic.  The topic name is 'B String Notes', and
-    it has multiple Notes.  Currently, the Topic class doesn't do much and could easily
-    be replaced with a simple list/dictionary, but we may add some functionality in the
-    future, so we will leave it as-is for now.
+    it has multiple Notes.  The notes are given as (midi, name, staff_loc) tuples and are stored
+    as three parallel arrays rather than one Note object each.  The Notes are only built once the topic is used.
     """
-    __slots__ = ['_name', '_notes']
+    __slots__ = ['_name', '_midi', '_names', '_staff_loc', '_notes']
 
     def __init__(self, name, notes):
         self._name = name
-        self._notes = notes
+        midi, names, staff_loc = zip(*notes)
+        self._midi = np.array(midi, dtype=np.int8)
+        self._names = names
+        self._staff_loc = np.array(staff_loc, dtype=np.int8)
+        self._notes = None  # built the first time the topic is used
 
     @property
     def name(self):
@@ -129,7 +179,15 @@ class Topic(object):
 
     @property
     def notes(self):
-        return list(self._notes)
+        if self._notes is None:
+            self._notes = tuple(self[i] for i in range(len(self)))
+        return self._notes
+
+    def __len__(self):
+        return len(self._midi)
+
+    def __getitem__(self, i):
+        return Note(int(self._midi[i]), self._names[i], int(self._staff_loc[i]))
 
 
 class StringTopic(Topic):
@@ -144,11 +202,15 @@ class StringTopic(Topic):
 class Trainer(object):
     """  Trainer contains a list of Topics and keeps track of practice notes as they are run"""
 
-    __slots__ = ['_que', '_noise_threshold', '_freq_step', '_fft_freqs', '_fft_imin', '_fft_imax',
-                 '_audio_buf', '_window_func', '_audio_stream', '_test_scale', '_noise_levels',
+    __slots__ = ['_que', '_noise_threshold', '_goertzel_coeffs', '_goertzel_power',
+                 '_raw', '_raw_i16', '_ring_idx', '_window_func', '_pyaudio', '_audio_stream', '_test_scale',
+                 '_noise_levels', '_noise_idx', '_noise_scratch',
                  '_topics', '_topic', '_topic_changed', '_notes_in_play', '_notes_in_queue',
-                 '_practiced_notes', '_add_notes_method', '_add_notes_method_changed',
-                 '_threshold_multiplier', '_add_notes_increment']
+                 '_notes_in_play_view', '_notes_in_queue_view',
+                 '_num_practiced', '_recent_practice', '_practice_counts', '_num_counted',
+                 '_add_notes_method', '_add_notes_method_changed',
+                 '_threshold_multiplier', '_add_notes_increment', '_tasks', '_audio_thread', '_rng',
+                 '_on_complete']
 
     ADD_NOTES_INCREMENTALLY = 0
     ADD_NOTES_ALL_AT_ONCE = 1
@@ -156,105 +218,125 @@ class Trainer(object):
     def __init__(self):
         #  print "Entering Trainer: __init__"
         self._noise_threshold = 100000  # initial setting
-        self._noise_levels = deque([self._noise_threshold] * 50)
-        self._topics = [StringTopic('Low E String Sans Sharps/Flats',
-                                    [Note(40, 'E', -5), Note(41, 'F', -4), Note(43, 'G', -3), Note(45, 'A', -2),
-                                     Note(47, 'B', -1), Note(48, 'C', 0), Note(50, 'D', 1), Note(52, 'E', 2)]),
+        # ring buffer of recent peaks, 50 full samples worth of frames
+        self._noise_levels = np.full(50 * SAMPLE_SIZE // HOP_SIZE, self._noise_threshold, dtype=np.float32)
+        self._noise_scratch = np.empty_like(self._noise_levels)  # partitioned in place, the history keeps its order
+        self._noise_idx = 0
+        self._topics = (StringTopic('Low E String Sans Sharps/Flats',
+                                    [(40, 'E', -5), (41, 'F', -4), (43, 'G', -3), (45, 'A', -2),
+                                     (47, 'B', -1), (48, 'C', 0), (50, 'D', 1), (52, 'E', 2)]),
                         StringTopic('Low E String Incl Sharps',
-                                    [Note(40, 'E', -5), Note(41, 'F', -4), Note(42, 'F#', -4), Note(43, 'G', -3),
-                                     Note(44, 'G#', -3), Note(45, 'A', -2), Note(46, 'A#', -2), Note(47, 'B', -1),
-                                     Note(48, 'C', 0), Note(49, 'C#', 0), Note(50, 'D', 1), Note(51, 'D#', 1),
-                                     Note(52, 'E', 2)]),
+                                    [(40, 'E', -5), (41, 'F', -4), (42, 'F#', -4), (43, 'G', -3),
+                                     (44, 'G#', -3), (45, 'A', -2), (46, 'A#', -2), (47, 'B', -1),
+                                     (48, 'C', 0), (49, 'C#', 0), (50, 'D', 1), (51, 'D#', 1),
+                                     (52, 'E', 2)]),
                         StringTopic('Low E String Incl Flats',
-                                    [Note(40, 'E', -5), Note(41, 'F', -4), Note(42, 'Gb', -3), Note(43, 'G', -3),
-                                     Note(44, 'Ab', -2), Note(45, 'A', -2), Note(46, 'Bb', -1), Note(47, 'B', -1),
-                                     Note(48, 'C', 0), Note(49, 'Db', 1), Note(50, 'D', 1), Note(51, 'Eb', 2),
-                                     Note(52, 'E', 2)]),
+                                    [(40, 'E', -5), (41, 'F', -4), (42, 'Gb', -3), (43, 'G', -3),
+                                     (44, 'Ab', -2), (45, 'A', -2), (46, 'Bb', -1), (47, 'B', -1),
+                                     (48, 'C', 0), (49, 'Db', 1), (50, 'D', 1), (51, 'Eb', 2),
+                                     (52, 'E', 2)]),
                         StringTopic('A String Sans Sharps/Flats',
-                                    [Note(45, 'A', -2), Note(47, 'B', -1), Note(48, 'C', 0), Note(50, 'D', 1),
-                                     Note(52, 'E', 2), Note(53, 'F', 3), Note(55, 'G', 4), Note(57, 'A', 5)]),
+                                    [(45, 'A', -2), (47, 'B', -1), (48, 'C', 0), (50, 'D', 1),
+                                     (52, 'E', 2), (53, 'F', 3), (55, 'G', 4), (57, 'A', 5)]),
                         StringTopic('A String Incl Sharps',
-                                    [Note(45, 'A', -2), Note(46, 'A#', -2), Note(47, 'B', -1), Note(48, 'C', 0),
-                                     Note(49, 'C#', 0), Note(50, 'D', 1), Note(51, 'D#', 1), Note(52, 'E', 2),
-                                     Note(53, 'F', 3), Note(54, 'F#', 3), Note(55, 'G', 4), Note(56, 'G#', 4),
-                                     Note(57, 'A', 5)]),
+                                    [(45, 'A', -2), (46, 'A#', -2), (47, 'B', -1), (48, 'C', 0),
+                                     (49, 'C#', 0), (50, 'D', 1), (51, 'D#', 1), (52, 'E', 2),
+                                     (53, 'F', 3), (54, 'F#', 3), (55, 'G', 4), (56, 'G#', 4),
+                                     (57, 'A', 5)]),
                         StringTopic('A String Incl Flats',
-                                    [Note(45, 'A', -2), Note(46, 'Bb', -1), Note(47, 'B', -1), Note(48, 'C', 0),
-                                     Note(49, 'Db', 1), Note(50, 'D', 1), Note(51, 'Eb', 2), Note(52, 'E', 2),
-                                     Note(53, 'F', 3), Note(54, 'Gb', 4), Note(55, 'G', 4), Note(56, 'Ab', 5),
-                                     Note(57, 'A', 5)]),
+                                    [(45, 'A', -2), (46, 'Bb', -1), (47, 'B', -1), (48, 'C', 0),
+                                     (49, 'Db', 1), (50, 'D', 1), (51, 'Eb', 2), (52, 'E', 2),
+                                     (53, 'F', 3), (54, 'Gb', 4), (55, 'G', 4), (56, 'Ab', 5),
+                                     (57, 'A', 5)]),
                         StringTopic('D String Sans Sharps/Flats',
-                                    [Note(50, 'D', 1), Note(52, 'E', 2), Note(53, 'F', 3), Note(55, 'G', 4),
-                                     Note(57, 'A', 5), Note(59, 'B', 6), Note(60, 'C', 7), Note(62, 'D', 8)]),
+                                    [(50, 'D', 1), (52, 'E', 2), (53, 'F', 3), (55, 'G', 4),
+                                     (57, 'A', 5), (59, 'B', 6), (60, 'C', 7), (62, 'D', 8)]),
                         StringTopic('D String Incl Sharps',
-                                    [Note(50, 'D', 1), Note(51, 'D#', 1), Note(52, 'E', 2), Note(53, 'F', 3),
-                                     Note(54, 'F#', 3), Note(55, 'G', 4), Note(56, 'G#', 4), Note(57, 'A', 5),
-                                     Note(58, 'A#', 5), Note(59, 'B', 6), Note(60, 'C', 7), Note(61, 'C#', 7),
-                                     Note(62, 'D', 8)]),
+                                    [(50, 'D', 1), (51, 'D#', 1), (52, 'E', 2), (53, 'F', 3),
+                                     (54, 'F#', 3), (55, 'G', 4), (56, 'G#', 4), (57, 'A', 5),
+                                     (58, 'A#', 5), (59, 'B', 6), (60, 'C', 7), (61, 'C#', 7),
+                                     (62, 'D', 8)]),
                         StringTopic('D String Incl Flats',
-                                    [Note(50, 'D', 1), Note(51, 'Eb', 2), Note(52, 'E', 2), Note(53, 'F', 3),
-                                     Note(54, 'Gb', 4), Note(55, 'G', 4), Note(56, 'Ab', 5), Note(57, 'A', 5),
-                                     Note(58, 'Bb', 6), Note(59, 'B', 6), Note(60, 'C', 7), Note(61, 'Db', 8),
-                                     Note(62, 'D', 8)]),
+                                    [(50, 'D', 1), (51, 'Eb', 2), (52, 'E', 2), (53, 'F', 3),
+                                     (54, 'Gb', 4), (55, 'G', 4), (56, 'Ab', 5), (57, 'A', 5),
+                                     (58, 'Bb', 6), (59, 'B', 6), (60, 'C', 7), (61, 'Db', 8),
+                                     (62, 'D', 8)]),
                         StringTopic('G String Sans Sharps/Flats',
-                                    [Note(55, 'G', 4), Note(57, 'A', 5), Note(59, 'B', 6), Note(60, 'C', 7),
-                                     Note(62, 'D', 8), Note(64, 'E', 9), Note(65, 'F', 10), Note(67, 'G', 11)]),
+                                    [(55, 'G', 4), (57, 'A', 5), (59, 'B', 6), (60, 'C', 7),
+                                     (62, 'D', 8), (64, 'E', 9), (65, 'F', 10), (67, 'G', 11)]),
                         StringTopic('G String Incl Sharps',
-                                    [Note(55, 'G', 4), Note(56, 'G#', 4), Note(57, 'A', 5), Note(58, 'A#', 5),
-                                     Note(59, 'B', 6), Note(60, 'C', 7), Note(61, 'C#', 7), Note(62, 'D', 8),
-                                     Note(63, 'D#', 8), Note(64, 'E', 9), Note(65, 'F', 10), Note(66, 'F#', 10),
-                                     Note(67, 'G', 11)]),
+                                    [(55, 'G', 4), (56, 'G#', 4), (57, 'A', 5), (58, 'A#', 5),
+                                     (59, 'B', 6), (60, 'C', 7), (61, 'C#', 7), (62, 'D', 8),
+                                     (63, 'D#', 8), (64, 'E', 9), (65, 'F', 10), (66, 'F#', 10),
+                                     (67, 'G', 11)]),
                         StringTopic('G String Incl Flats',
-                                    [Note(55, 'G', 4), Note(56, 'Ab', 5), Note(57, 'A', 5), Note(58, 'Bb', 6),
-                                     Note(59, 'B', 6), Note(60, 'C', 7), Note(61, 'Db', 8), Note(62, 'D', 8),
-                                     Note(63, 'Eb', 9), Note(64, 'E', 9), Note(65, 'F', 10), Note(66, 'Gb', 11),
-                                     Note(67, 'G', 11)]),
+                                    [(55, 'G', 4), (56, 'Ab', 5), (57, 'A', 5), (58, 'Bb', 6),
+                                     (59, 'B', 6), (60, 'C', 7), (61, 'Db', 8), (62, 'D', 8),
+                                     (63, 'Eb', 9), (64, 'E', 9), (65, 'F', 10), (66, 'Gb', 11),
+                                     (67, 'G', 11)]),
                         StringTopic('B String Sans Sharps/Flats',
-                                    [Note(59, 'B', 6), Note(60, 'C', 7), Note(62, 'D', 8), Note(64, 'E', 9),
-                                     Note(65, 'F', 10), Note(67, 'G', 11), Note(69, 'A', 12), Note(71, 'B', 13)]),
+                                    [(59, 'B', 6), (60, 'C', 7), (62, 'D', 8), (64, 'E', 9),
+                                     (65, 'F', 10), (67, 'G', 11), (69, 'A', 12), (71, 'B', 13)]),
                         StringTopic('B String Incl Sharps',
-                                    [Note(59, 'B', 6), Note(60, 'C', 7), Note(61, 'C#', 7), Note(62, 'D', 8),
-                                     Note(63, 'D#', 8), Note(64, 'E', 9), Note(65, 'F', 10), Note(66, 'F#', 10),
-                                     Note(67, 'G', 11), Note(68, 'G#', 11), Note(69, 'A', 12), Note(70, 'A#', 12),
-                                     Note(71, 'B', 13)]),
+                                    [(59, 'B', 6), (60, 'C', 7), (61, 'C#', 7), (62, 'D', 8),
+                                     (63, 'D#', 8), (64, 'E', 9), (65, 'F', 10), (66, 'F#', 10),
+                                     (67, 'G', 11), (68, 'G#', 11), (69, 'A', 12), (70, 'A#', 12),
+                                     (71, 'B', 13)]),
                         StringTopic('B String Incl Flats',
-                                    [Note(59, 'B', 6), Note(60, 'C', 7), Note(61, 'Db', 8), Note(62, 'D', 8),
-                                     Note(63, 'Eb', 9), Note(64, 'E', 9), Note(65, 'F', 10), Note(66, 'Gb', 11),
-                                     Note(67, 'G', 11), Note(68, 'Ab', 12), Note(69, 'A', 12), Note(70, 'Bb', 13),
-                                     Note(71, 'B', 13)]),
+                                    [(59, 'B', 6), (60, 'C', 7), (61, 'Db', 8), (62, 'D', 8),
+                                     (63, 'Eb', 9), (64, 'E', 9), (65, 'F', 10), (66, 'Gb', 11),
+                                     (67, 'G', 11), (68, 'Ab', 12), (69, 'A', 12), (70, 'Bb', 13),
+                                     (71, 'B', 13)]),
                         StringTopic('High E String Sans Sharps/Flats',
-                                    [Note(64, 'E', 9), Note(65, 'F', 10), Note(67, 'G', 11), Note(69, 'A', 12),
-                                     Note(71, 'B', 13), Note(72, 'C', 14), Note(74, 'D', 15), Note(76, 'E', 16)]),
+                                    [(64, 'E', 9), (65, 'F', 10), (67, 'G', 11), (69, 'A', 12),
+                                     (71, 'B', 13), (72, 'C', 14), (74, 'D', 15), (76, 'E', 16)]),
                         StringTopic('High E String Incl Sharps',
-                                    [Note(64, 'E', 9), Note(65, 'F', 10), Note(66, 'F#', 10), Note(67, 'G', 11),
-                                     Note(68, 'G#', 11), Note(69, 'A', 12), Note(70, 'A#', 12), Note(71, 'B', 13),
-                                     Note(72, 'C', 14), Note(73, 'C#', 14), Note(74, 'D', 15), Note(75, 'D#', 15),
-                                     Note(76, 'E', 16)]),
+                                    [(64, 'E', 9), (65, 'F', 10), (66, 'F#', 10), (67, 'G', 11),
+                                     (68, 'G#', 11), (69, 'A', 12), (70, 'A#', 12), (71, 'B', 13),
+                                     (72, 'C', 14), (73, 'C#', 14), (74, 'D', 15), (75, 'D#', 15),
+                                     (76, 'E', 16)]),
                         StringTopic('High E String Incl Flats',
-                                    [Note(64, 'E', 9), Note(65, 'F', 10), Note(66, 'Gb', 11), Note(67, 'G', 11),
-                                     Note(68, 'Ab', 12), Note(69, 'A', 12), Note(70, 'Bb', 13), Note(71, 'B', 13),
-                                     Note(72, 'C', 14), Note(73, 'Db', 15), Note(74, 'D', 15), Note(75, 'Eb', 16),
-                                     Note(76, 'E', 16)])]
+                                    [(64, 'E', 9), (65, 'F', 10), (66, 'Gb', 11), (67, 'G', 11),
+                                     (68, 'Ab', 12), (69, 'A', 12), (70, 'Bb', 13), (71, 'B', 13),
+                                     (72, 'C', 14), (73, 'Db', 15), (74, 'D', 15), (75, 'Eb', 16),
+                                     (76, 'E', 16)]))
         self._topic = self._topics[1]
         self._add_notes_method = Trainer.ADD_NOTES_INCREMENTALLY
         self._notes_in_play = []
         self._notes_in_queue = []
-        self._practiced_notes = []
+        self._notes_in_play_view = None  # tuple copies handed out by the properties, None once out of date
+        self._notes_in_queue_view = None
+        self._num_practiced = 0  # all practice notes for the topic, including the ones no longer kept below
+        self._rng = random.Random()  # our own generator rather than the module-level one shared by every thread
+        # the last few practice notes, newest last.  Nothing looks further back than 5x the notes in play, and there
+        # are never more notes in play than in the topic
+        self._recent_practice = deque(maxlen=5 * len(self._topic))
+        self._practice_counts = Counter()  # note -> times practiced within the newest _num_counted practice notes
+        self._num_counted = 0
         self._topic_changed = True
         self._add_notes_method_changed = False
         self._threshold_multiplier = THRESHOLD_MULTIPLIER_DEFAULT
         self._add_notes_increment = ADD_NOTES_INCREMENT_DEFAULT
-        self._freq_step = float(SAMPLING_FREQ) / SAMPLE_SIZE
-        self._fft_freqs = np.fft.fftfreq(SAMPLE_SIZE, 1. / SAMPLING_FREQ)
-        self._fft_imin = (np.abs(self._fft_freqs - Note.midi_to_freq(MIDI_MIN))).argmin()
-        self._fft_imax = (np.abs(self._fft_freqs - Note.midi_to_freq(MIDI_MAX))).argmin() + 1
-        self._audio_buf = np.zeros(SAMPLE_SIZE, dtype=np.float32)
-        self._window_func = np.hanning(SAMPLE_SIZE)
-        self._audio_stream = pyaudio.PyAudio().open(format=pyaudio.paInt16,
-                                                    channels=1,
-                                                    rate=SAMPLING_FREQ,
-                                                    input=True,
-                                                    frames_per_buffer=SAMPLE_SIZE)
+        goertzel_freqs = Note.midi_to_freq(np.arange(MIDI_MIN, MIDI_MAX + 1))
+        self._goertzel_coeffs = (2 * np.cos(2 * np.pi * goertzel_freqs / SAMPLING_FREQ)).astype(np.float32)
+        self._goertzel_power = np.zeros(len(goertzel_freqs), dtype=np.float32)
+        # ring buffer of the most recent audio.  Every hop is written twice, SAMPLE_SIZE apart, so the
+        # last SAMPLE_SIZE samples can always be viewed in order as one slice without copying.
+        self._raw = bytearray(2 * SAMPLE_SIZE * 2)  # 2 bytes per int16 sample
+        self._raw_i16 = np.frombuffer(self._raw, dtype=np.int16)
+        self._ring_idx = 0
+        self._window_func = np.hanning(SAMPLE_SIZE).astype(np.float32)
+        self._pyaudio = pyaudio.PyAudio()
+        self._audio_stream = self._pyaudio.open(format=pyaudio.paInt16,
+                                                channels=1,
+                                                rate=SAMPLING_FREQ,
+                                                input=True,
+                                                frames_per_buffer=HOP_SIZE)
+        self._tasks = Queue()  # practice notes waiting for the audio thread
+        self._on_complete = None  # called on the audio thread when the target note was heard
+        self._audio_thread = Thread(target=self._audio_loop)
+        self._audio_thread.daemon = True  # close() stops it, this keeps a stuck or crashed GUI from hanging on exit
+        self._audio_thread.start()
         #  print "Exiting Trainer: __init__"
 
     def new_note_practice(self):
@@ -264,74 +346,87 @@ class Trainer(object):
         if self._topic_changed or self._add_notes_method_changed:
             self._topic_changed = False
             self._add_notes_method_changed = False
-            self._practiced_notes = []
+            self._num_practiced = 0
+            self._recent_practice = deque(maxlen=5 * len(self._topic))
+            self._practice_counts.clear()
+            self._num_counted = 0
             if self._add_notes_method == Trainer.ADD_NOTES_INCREMENTALLY:  # slowly add new notes to practice
-                self._notes_in_queue = self._topic.notes
+                self._notes_in_queue = list(self._topic.notes)
                 self._notes_in_play = []
                 for x in range(0, 3):  # lets pick the first three notes to practice.
-                    r = random.choice(self._notes_in_queue)
-                    self._notes_in_play.append(r)
-                    del (self._notes_in_queue[self._notes_in_queue.index(r)])
+                    self._notes_in_play.append(self._random_pop(self._notes_in_queue))
             elif self._add_notes_method == Trainer.ADD_NOTES_ALL_AT_ONCE:  # practice all the notes in the topic
                 self._notes_in_queue = []
-                self._notes_in_play = self._topic.notes
-        elif (len(self._practiced_notes) > 0 and len(self._practiced_notes) % self._add_notes_increment == 0
+                self._notes_in_play = list(self._topic.notes)
+            self._notes_in_play_view = None
+            self._notes_in_queue_view = None
+        elif (self._num_practiced > 0 and self._num_practiced % self._add_notes_increment == 0
               and len(self._notes_in_queue) > 0):  # we are adding notes incrementally and have notes still in queue
-            r = random.choice(self._notes_in_queue)
-            self._notes_in_play.append(r)
-            del (self._notes_in_queue[self._notes_in_queue.index(r)])
+            self._notes_in_play.append(self._random_pop(self._notes_in_queue))
+            self._notes_in_play_view = None
+            self._notes_in_queue_view = None
 
         # Let's pick a note to play
-        if len(self._practiced_notes) >= 4:
+        if self._num_practiced >= 4:
             notes = list(self._notes_sorted_by_times_practiced())  # pick one of the least practiced notes
             notes.remove(self.current_note_practice.target_note)  # but don't repeat the last note
-            r = notes[random.randint(0, min((len(notes) - 1), 2))]  # pick from the 3 least played notes
-        elif len(self._practiced_notes) > 0:  # don't repeat the last note
+            r = notes[self._rng.randrange(min(len(notes), 3))]  # pick from the 3 least played notes
+        elif self._num_practiced > 0:  # don't repeat the last note
             notes = list(self._notes_in_play)
             notes.remove(self.current_note_practice.target_note)
-            r = random.choice(notes)
+            r = self._rng.choice(notes)
         else:  # it is the first note for this topic (or add notes method has changed) so pick any note
-            r = random.choice(self._notes_in_play)
+            r = self._rng.choice(self._notes_in_play)
 
-        # Create a new practice note and start the audio capture
+        # Create a new practice note and hand it to the audio thread to capture
         note_practice = NotePractice(r)
-        self._practiced_notes.append(note_practice)
-        t1 = Thread(target=self._capture_note_thread, args=(note_practice,))
-        t1.start()
+        self._num_practiced += 1
+        self._record_practice(note_practice)
+        self._tasks.put(note_practice)
+
+    def _random_pop(self, notes):
+        """removes and returns a random note from the list.  The last note is swapped into its place
+        so nothing has to be searched for or shifted down"""
+        i = self._rng.randrange(len(notes))
+        r = notes[i]
+        notes[i] = notes[-1]
+        notes.pop()
+        return r
+
+    def _record_practice(self, note_practice):
+        """keep a running count of how many times each note was practiced"""
+        if self._num_counted == len(self._recent_practice) == self._recent_practice.maxlen:
+            self._practice_counts[self._recent_practice[0].target_note] -= 1  # the oldest is about to be dropped
+            self._num_counted -= 1
+        self._recent_practice.append(note_practice)
+        self._practice_counts[note_practice.target_note] += 1
+        self._num_counted += 1
 
     def _notes_sorted_by_times_practiced(self):
         """sort the practiced notes by the number of times they were chosen.  This
-        ensures we practice each note about the same number of times"""
-        note_times = [{'Note': n, 'Times': 0} for n in self._notes_in_play]
-        counter = 0
-        for note_practice in reversed(self._practiced_notes):
-            counter += 1
-            if counter > len(note_times) * 5:  # don't look too far back in time. 5x the number of notes is good enough
-                break
-            for i in note_times:
-                if i['Note'] == note_practice.target_note:
-                    i['Times'] += 1
-                    break
-        note_times.sort(key=lambda x: x['Times'])
-        return [n['Note'] for n in note_times]
+        ensures we practice each note about the same number of times.  We don't look too far back in time,
+        5x the number of notes in play is good enough.  The count is moved to that window here rather than when
+        recording, so a note added to play makes the count reach further back again straight away"""
+        window = min(len(self._recent_practice), 5 * len(self._notes_in_play))
+        while self._num_counted < window:
+            self._num_counted += 1
+            self._practice_counts[self._recent_practice[-self._num_counted].target_note] += 1
+        while self._num_counted > window:
+            self._practice_counts[self._recent_practice[-self._num_counted].target_note] -= 1
+            self._num_counted -= 1
+        return sorted(self._notes_in_play, key=lambda n: self._practice_counts[n])
 
     def _notes_sorted_by_elapsed_time(self):
         """might use this function to adjust notes practiced by how QUICKLY the student is playing the correct note"""
-        note_times = [{'Note': n, 'Times': 0, 'Avg_Elapsed_Time': 0} for n in self._notes_in_play]
-        counter = 0
-        for note_practice in reversed(self._practiced_notes):  # start with the most recent practice note
-            counter += 1
-            if counter > len(note_times) * 5:  # don't look too far back in time. 5x the number of notes is good enough
-                break
-            for i in note_times:
-                if i['Note'] == note_practice.target_note:
-                    i['Times'] += 1
-                    i['Avg_Elapsed_Time'] = float((i['Avg_Elapsed_Time'] * (i['Times'] - 1))
-                                                  + min(5.0, note_practice.elapsed_time)) / i[
-                                                'Times']  # set max to 5secs
-                    break
-        note_times.sort(key=lambda x: x['Avg_Elapsed_Time'], reverse=True)
-        return [n['Note'] for n in note_times]
+        # only the newest 5x the notes in play, like the count in _notes_sorted_by_times_practiced
+        num_recent = min(len(self._recent_practice), 5 * len(self._notes_in_play))
+        recent = list(islice(self._recent_practice, len(self._recent_practice) - num_recent, None))
+        midi = np.fromiter((p.target_note.midi for p in recent), dtype=np.intp, count=num_recent)
+        elapsed = np.fromiter((p.elapsed_time for p in recent), dtype=np.float64, count=num_recent)
+        # average elapsed time per midi value in one pass, set max to 5secs
+        sums = np.bincount(midi, weights=np.minimum(elapsed, 5.0), minlength=MIDI_MAX + 1)
+        avg_elapsed = sums / np.maximum(np.bincount(midi, minlength=MIDI_MAX + 1), 1)
+        return sorted(self._notes_in_play, key=lambda n: avg_elapsed[n.midi], reverse=True)
 
     @property
     def noise_threshold(self):
@@ -361,7 +456,7 @@ class Trainer(object):
 
     @property
     def topics(self):
-        return list(self._topics)
+        return self._topics
 
     @property
     def current_topic(self):
@@ -369,11 +464,15 @@ class Trainer(object):
 
     @property
     def notes_in_play(self):
-        return list(self._notes_in_play)
+        if self._notes_in_play_view is None:
+            self._notes_in_play_view = tuple(self._notes_in_play)
+        return self._notes_in_play_view
 
     @property
     def notes_in_queue(self):
-        return list(self._notes_in_queue)
+        if self._notes_in_queue_view is None:
+            self._notes_in_queue_view = tuple(self._notes_in_queue)
+        return self._notes_in_queue_view
 
     @property
     def add_notes_method(self):
@@ -400,43 +499,92 @@ class Trainer(object):
 
     @property
     def current_note_practice(self):
-        if len(self._practiced_notes) > 0:
-            return self._practiced_notes[-1]
+        if len(self._recent_practice) > 0:
+            return self._recent_practice[-1]
         else:
             return None
 
     @property
     def current_target_note(self):
-        if len(self._practiced_notes) > 0:
-            return self._practiced_notes[-1].target_note
+        if len(self._recent_practice) > 0:
+            return self._recent_practice[-1].target_note
         else:
             return None
 
+    @property
+    def on_complete(self):
+        return self._on_complete
+
+    @on_complete.setter
+    def on_complete(self, callback):
+        if callback is not None and not callable(callback):
+            raise ValueError
+        self._on_complete = callback
+
     def kill_current_note_practice(self):
         if self.current_note_practice is not None:
             self.current_note_practice.terminate = True
 
-    def _capture_note_thread(self, note_practice):
-        """This thread captures a note heard"""
-        #  print "Entering _capture_note_thread"
+    def close(self):
+        """stops the audio thread, which releases the audio device on its way out.  The trainer can't be used
+        afterwards.  This only waits briefly: the GUI calls it, and the audio thread may itself be waiting for the GUI
+        thread to take a completed note (see on_complete).  If so, the daemon thread is left to the interpreter."""
+        self.kill_current_note_practice()
+        self._tasks.put(None)  # tells the audio thread to return once the current note capture has stopped
+        self._audio_thread.join(0.5)  # a capture stops within one hop, about 0.1 secs
+
+    def _audio_loop(self):
+        """The audio thread.  It lives as long as the application and captures one practice note after another,
+        rather than starting a new thread for every note.  A None task stops it, see close()."""
+        try:
+            os.nice(-5)  # on linux this only raises the priority of this thread.  Needs permission, so best effort
+        except (OSError, AttributeError):
+            pass
+        try:
+            while True:
+                note_practice = self._tasks.get()
+                if note_practice is None:
+                    return
+                self._capture_note(note_practice)
+        finally:
+            # the stream is only touched on this thread, so it is released here rather than by close()
+            self._audio_stream.close()
+            self._pyaudio.terminate()
+
+    def _capture_note(self, note_practice):
+        """This captures a note heard"""
+        #  print "Entering _capture_note"
+        self._raw_i16[:] = 0  # forget the previous note so it isn't heard again
         self._audio_stream.start_stream()
         note_practice.start_timestamp = time.time()
         while self._audio_stream.is_active() and note_practice.terminate is False:
-            self._audio_buf = np.fromstring(self._audio_stream.read(SAMPLE_SIZE), np.int16)
-            fft = np.fft.rfft(self._audio_buf * self._window_func)
-            freq = self._fft_freqs[np.abs(fft[self._fft_imin:self._fft_imax]).argmax() + self._fft_imin]
-            peak = np.average(np.abs(fft))
-            self._noise_levels.popleft()
-            self._noise_levels.append(peak)
-            self._noise_threshold = np.average(sorted(self._noise_levels)[0:10]) * self._threshold_multiplier
+            hop = self._audio_stream.read(HOP_SIZE, exception_on_overflow=False)
+            i = self._ring_idx
+            self._raw[2 * i:2 * (i + HOP_SIZE)] = hop  # copied straight into the buffer behind _raw_i16
+            self._raw[2 * (i + SAMPLE_SIZE):2 * (i + SAMPLE_SIZE + HOP_SIZE)] = hop
+            self._ring_idx = (i + HOP_SIZE) % SAMPLE_SIZE
+            goertzel_bank(self._raw_i16[self._ring_idx:self._ring_idx + SAMPLE_SIZE], self._window_func,
+                          self._goertzel_coeffs, self._goertzel_power)
+            midi = MIDI_MIN + self._goertzel_power.argmax()
+            peak = np.sqrt(self._goertzel_power.mean())  # rms magnitude, the argmax above needs no sqrt
+            self._noise_levels[self._noise_idx] = peak
+            self._noise_idx = (self._noise_idx + 1) % len(self._noise_levels)
+            # average of the quietest fifth of the frames, partition finds them without sorting the whole history
+            quietest = len(self._noise_levels) // 5
+            self._noise_scratch[:] = self._noise_levels
+            self._noise_scratch.partition(quietest)
+            self._noise_threshold = self._noise_scratch[:quietest].mean() * self._threshold_multiplier
             if peak > self._noise_threshold:
                 note_practice.num_notes_heard += 1
-                if Note.freq_to_midi(freq) == note_practice.target_note.midi:
+                if midi == note_practice.target_note.midi:
                     note_practice.success_timestamp = time.time()
                     note_practice.complete = True
                     self._audio_stream.stop_stream()
+                    callback = self._on_complete  # read once, the Tk thread may clear it while closing
+                    if callback is not None:
+                        callback()
                     break
-        #  print "Exiting _capture_note_thread"
+        #  print "Exiting _capture_note"
 
 
 class NotePractice(object):
@@ -521,17 +669,20 @@ class MainGUI(object):
     def __init__(self):
         # print "Entering MainGUI: __init__"
         self._trainer = Trainer()
+        # the trainer calls this from the audio thread, after() hands the work over to the Tk thread
+        self._trainer.on_complete = lambda: self._gui_top.after(0, self._on_note_complete)
         self._in_training = False
-        self._target_note_oval = None
-        self._sharp_flat_symbol = None
+        self._pending_after = None  # the next _start_training after a note was played, cancelled on closing
         self._scheduler = sched.scheduler(time.time, time.sleep)
 
         self._gui_top = Tkinter.Tk()
         self._gui_top.title("Guitar Fretboard Trainer")
         self._gui_top.resizable(width=False, height=False)
+        self._accidental_font = tkFont.Font(family='Helvetica', size=16)  # for the '#' and 'b' next to the note
+        self._ui_font = tkFont.Font(family='Verdana', size=10, weight='bold')  # shared by every widget and status text
 
-        self._training_topic_list_label = Label(self._gui_top, text="<- TOPICS ->", font="Verdana 10 bold")
-        self._training_topic_list = Listbox(self._gui_top, width=35, selectmode="single", font="Verdana 10 bold")
+        self._training_topic_list_label = Label(self._gui_top, text="<- TOPICS ->", font=self._ui_font)
+        self._training_topic_list = Listbox(self._gui_top, width=35, selectmode="single", font=self._ui_font)
         self._training_topic_scroll = Scrollbar(self._gui_top)
         self._training_topic_list.config(yscrollcommand=self._training_topic_scroll.set)
         self._training_topic_scroll.config(command=self._training_topic_list.yview)
@@ -544,40 +695,48 @@ class MainGUI(object):
         self._training_topic_list.select_set(1)
         self._training_topic_list.bind('<<ListboxSelect>>', self._on_set_topic)
 
-        self._canvas_label = Label(self._gui_top, text="<- STAFF ->", font="Verdana 10 bold")
+        self._canvas_label = Label(self._gui_top, text="<- STAFF ->", font=self._ui_font)
         self._canvas = Tkinter.Canvas(self._gui_top, bg="white", height=150, width=200)
 
-        self._high_g_ledger = self._canvas.create_line((85, 20, 115, 20), fill="black")
-        self._high_e_ledger = self._canvas.create_line((85, 30, 115, 30), fill="black")
-        self._high_c_ledger = self._canvas.create_line((85, 40, 115, 40), fill="black")
-        self._high_a_ledger = self._canvas.create_line((85, 50, 115, 50), fill="black")
+        # the five staff lines never change, so they are drawn once into an image that is a single canvas item.
+        # Tk's own PhotoImage is enough for this, no need for PIL
+        self._staff_image = Tkinter.PhotoImage(master=self._gui_top, width=200, height=150)
+        for y in (60, 70, 80, 90, 100):
+            self._staff_image.put("black", to=(40, y, 161, y + 1))
+        self._canvas.create_image(0, 0, anchor=Tkinter.NW, image=self._staff_image)
+
+        self._ledgers = tuple(self._canvas.create_line(coords, fill="black", tags="ledger")
+                              for _, coords in LEDGERS_ABOVE + LEDGERS_BELOW)
 
-        self._canvas.create_line((40, 60, 160, 60), fill="black")
-        self._canvas.create_line((40, 70, 160, 70), fill="black")
-        self._canvas.create_line((40, 80, 160, 80), fill="black")
-        self._canvas.create_line((40, 90, 160, 90), fill="black")
-        self._canvas.create_line((40, 100, 160, 100), fill="black")
+        # note oval box, '#'/'b' position and which of the ledgers above are shown, for every staff location
+        self._staff_layout = {s: ((93, 106 - 5 * s, 107, 114 - 5 * s), (90, 118 - 5 * s),
+                                  tuple(s >= loc for loc, _ in LEDGERS_ABOVE)
+                                  + tuple(s <= loc for loc, _ in LEDGERS_BELOW))
+                              for s in range(-6, 20)}
 
-        self._middle_c_ledger = self._canvas.create_line((85, 110, 115, 110), fill="black")
-        self._low_a_ledger = self._canvas.create_line((85, 120, 115, 120), fill="black")
-        self._low_f_ledger = self._canvas.create_line((85, 130, 115, 130), fill="black")
+        # the note and its '#' or 'b' symbol are moved and restyled for every note rather than redrawn
+        self._target_note_oval = self._canvas.create_oval(0, 0, 0, 0, width=3, state=Tkinter.HIDDEN)
+        self._sharp_flat_symbol = self._canvas.create_text(0, 0, font=self._accidental_font,
+                                                           anchor=Tkinter.SE, text="")
 
-        self._status_label = Label(self._gui_top, text="<- STATUS ->", font="Verdana 10 bold")
+        self._status_label = Label(self._gui_top, text="<- STATUS ->", font=self._ui_font)
         self._status = Tkinter.Canvas(self._gui_top, bg="black", height=150, width=300)
         self._status_txt1 = self._status.create_text(10, 10, anchor=Tkinter.NW, text="",
-                                                     font="Verdana 10 bold", fill="green")
-        self._status_txt2 = self._status.create_text(10, 30, anchor=Tkinter.NW, text="",
-                                                     font="Verdana 10 bold", fill="green")
-        self._status_txt3 = self._status.create_text(10, 50, anchor=Tkinter.NW, text="",
-                                                     font="Verdana 10 bold", fill="green")
+                                                     font=self._ui_font, fill="green")
+        self._status_txt2 = self._status.create_text(10, 40, anchor=Tkinter.NW, text="",
+                                                     font=self._ui_font, fill="green")
+        self._status_txt3 = self._status.create_text(10, 80, anchor=Tkinter.NW, text="",
+                                                     font=self._ui_font, fill="green")
+        self._last_on_str = None  # the note names last shown, so unchanged status texts are not set again
+        self._last_off_str = None
 
         # add note method
-        self._add_note_label = Label(self._gui_top, text="Add Note Method:", font="Verdana 10 bold")
+        self._add_note_label = Label(self._gui_top, text="Add Note Method:", font=self._ui_font)
         self._add_note_method_inc_radio = Radiobutton(self._gui_top, text="Incrementally",
-                                                      font="Verdana 10 bold",
+                                                      font=self._ui_font,
                                                       command=self._on_note_method_change_inc, value=1)
         self._add_note_method_all_radio = Radiobutton(self._gui_top, text="All-at-Once",
-                                                      font="Verdana 10 bold",
+                                                      font=self._ui_font,
                                                       command=self._on_note_method_change_all, value=2)
 
         if self._trainer.add_notes_method == self._trainer.ADD_NOTES_INCREMENTALLY:
@@ -589,28 +748,28 @@ class MainGUI(object):
 
         # add threshold setter
         self._threshold_multiplier = DoubleVar(self._gui_top)
-        self._threshold_mult_label = Label(self._gui_top, text="Noise\nThreshold:", font="Verdana 10 bold")
-        self._threshold_mult_spin = Spinbox(self._gui_top, width=5, font="Verdana 10 bold",
+        self._threshold_mult_label = Label(self._gui_top, text="Noise\nThreshold:", font=self._ui_font)
+        self._threshold_mult_spin = Spinbox(self._gui_top, width=5, font=self._ui_font,
                                             values=(1.0, 1.1, 1.2, 1.3, 1.4, 1.5,
                                                     1.6, 1.7, 1.8, 1.9, 2.0,
                                                     2.1, 2.2, 2.3, 2.4, 2.5),
-                                            textvariable=str(self._threshold_multiplier),
+                                            textvariable=self._threshold_multiplier,
                                             command=self._on_threshold_change)
         self._threshold_multiplier.set(self._trainer.threshold_multiplier)
 
         # add note increment setter
         self._add_notes_increment = IntVar(self._gui_top)
-        self._add_notes_increment_label = Label(self._gui_top, text="Note\nIncrement:", font="Verdana 10 bold")
-        self._add_notes_increment_spin = Spinbox(self._gui_top, width=5, font="Verdana 10 bold",
+        self._add_notes_increment_label = Label(self._gui_top, text="Note\nIncrement:", font=self._ui_font)
+        self._add_notes_increment_spin = Spinbox(self._gui_top, width=5, font=self._ui_font,
                                                  values=(10, 20, 30, 40, 50),
-                                                 textvariable=str(self._add_notes_increment),
+                                                 textvariable=self._add_notes_increment,
                                                  command=self._on_add_notes_increment_change)
         self._add_notes_increment.set(self._trainer.add_notes_increment)
 
         # add buttons
-        self._start_button = Tkinter.Button(self._gui_top, text="Start", font="Verdana 10 bold",
+        self._start_button = Tkinter.Button(self._gui_top, text="Start", font=self._ui_font,
                                             command=self._start_training)
-        self._exit_button = Tkinter.Button(self._gui_top, text="Exit", font="Verdana 10 bold",
+        self._exit_button = Tkinter.Button(self._gui_top, text="Exit", font=self._ui_font,
                                            command=self._on_closing)
 
         # layout the widgets
@@ -689,117 +848,79 @@ class MainGUI(object):
         self._gui_top.protocol("WM_DELETE_WINDOW", self._on_closing)
 
         #  print "Exiting MainGUI: __init__"
+
+    def mainloop(self):
+        """runs the GUI until the window is closed.  Kept out of __init__ so the GUI is fully built (and goertzel_bank
+        compiled, which numba does at import) before the user can click Start."""
         self._gui_top.mainloop()
 
     def _start_training(self):
         #  print "Entering _start_training"
+        if self._pending_after is not None:  # Start was clicked during the pause, or this is the pending call itself
+            self._gui_top.after_cancel(self._pending_after)
+            self._pending_after = None
         if not self._in_training and (self._trainer.current_note_practice is None
                                       or self._trainer.current_note_practice.complete):
             self._trainer.new_note_practice()
-            self._canvas.delete(self._high_g_ledger)
-            self._canvas.delete(self._high_e_ledger)
-            self._canvas.delete(self._high_c_ledger)
-            self._canvas.delete(self._high_a_ledger)
-            self._canvas.delete(self._middle_c_ledger)
-            self._canvas.delete(self._low_a_ledger)
-            self._canvas.delete(self._low_f_ledger)
-            self._canvas.delete(self._target_note_oval)
-            self._canvas.delete(self._sharp_flat_symbol)
-            # self._status.delete(self._status_txt1)  # leave last note in status window?
-            self._status.delete(self._status_txt2)
-            self._status.delete(self._status_txt3)
-
-            staff_loc = self._trainer.current_target_note.staff_loc
-
-            # draw ledger lines if needed, depending on the note to be played
-            if staff_loc >= 12:
-                self._high_a_ledger = self._canvas.create_line((85, 50, 115, 50), fill="black")
-            if staff_loc >= 14:
-                self._high_c_ledger = self._canvas.create_line((85, 40, 115, 40), fill="black")
-            if staff_loc >= 16:
-                self._high_e_ledger = self._canvas.create_line((85, 30, 115, 30), fill="black")
-            if staff_loc >= 18:
-                self._high_g_ledger = self._canvas.create_line((85, 20, 115, 20), fill="black")
-
-            if staff_loc <= 0:
-                self._middle_c_ledger = self._canvas.create_line((85, 110, 115, 110), fill="black")
-            if staff_loc <= -2:
-                self._low_a_ledger = self._canvas.create_line((85, 120, 115, 120), fill="black")
-            if staff_loc <= -4:
-                self._low_f_ledger = self._canvas.create_line((85, 130, 115, 130), fill="black")
-
-            self._target_note_oval = self._canvas.create_oval(93, 106 - (5 * staff_loc),
-                                                              107, 114 - (5 * staff_loc), width=3)
-
-            # add a '#' or 'b' symbol to the note if necessary
-            if len(self._trainer.current_target_note.name) > 1:
-                symbol = self._trainer.current_target_note.name[1:]
-                self._sharp_flat_symbol = self._canvas.create_text(90, 118 - (5 * staff_loc),
-                                                                   font=tkFont.Font(family='Helvetica',
-                                                                                    size=16),
-                                                                   anchor=Tkinter.SE, text=symbol)
-
-            txt2 = "Notes in Play:\n" + self._note_names_on()
-            self._status_txt2 = self._status.create_text(10, 40, anchor=Tkinter.NW, text=txt2,
-                                                         font="Verdana 10 bold", fill="green")
-            txt3 = "Notes in Queue:\n" + self._note_names_off()
-            self._status_txt3 = self._status.create_text(10, 80, anchor=Tkinter.NW, text=txt3,
-                                                         font="Verdana 10 bold", fill="green")
+
+            oval_box, symbol_xy, ledger_mask = self._staff_layout[self._trainer.current_target_note.staff_loc]
+
+            # hide every ledger line with one call through their tag, then show the ones the note needs
+            self._canvas.itemconfig("ledger", state=Tkinter.HIDDEN)
+            for ledger, show in zip(self._ledgers, ledger_mask):
+                if show:
+                    self._canvas.itemconfig(ledger, state=Tkinter.NORMAL)
+
+            self._canvas.coords(self._target_note_oval, *oval_box)
+            self._canvas.itemconfig(self._target_note_oval, state=Tkinter.NORMAL, width=3, fill="")
+
+            # add a '#' or 'b' symbol to the note if necessary, an empty text shows nothing
+            self._canvas.coords(self._sharp_flat_symbol, *symbol_xy)
+            self._canvas.itemconfig(self._sharp_flat_symbol, text=self._trainer.current_target_note.accidental)
+
+            self._update_status_notes()
 
             self._in_training = True
-            self._check_note_practice_status()
         # print "Exiting _start_training"
 
-    def _check_note_practice_status(self):
-        """check if the correct note was played which means the note practice is complete and it's time for another
+    def _on_note_complete(self):
+        """the correct note was played which means the note practice is complete and it's time for another
         practice note.  Display the note in green so that the user sees the correct note was played, wait one second
         and ask the trainer for another note."""
-        #  print "Entering _check_note_practice_status"
+        #  print "Entering _on_note_complete"
         if self._in_training:
             if self._trainer.current_note_practice.complete:
-                self._status.delete(self._status_txt1)
-                self._status.delete(self._status_txt2)
-                self._status.delete(self._status_txt3)
                 txt1 = self._trainer.current_target_note.name + ", "
                 txt1 += str(round(self._trainer.current_note_practice.elapsed_time, 2))
                 txt1 += "secs"
-                self._status_txt1 = self._status.create_text(10, 10, anchor=Tkinter.NW, text=txt1,
-                                                             font="Verdana 10 bold", fill="green")
-                txt2 = "Notes in Play:\n" + self._note_names_on()
-                self._status_txt2 = self._status.create_text(10, 40, anchor=Tkinter.NW, text=txt2,
-                                                             font="Verdana 10 bold", fill="green")
-                txt3 = "Notes in Queue:\n" + self._note_names_off()
-                self._status_txt3 = self._status.create_text(10, 80, anchor=Tkinter.NW, text=txt3,
-                                                             font="Verdana 10 bold", fill="green")
-
-                self._canvas.delete(self._target_note_oval)
-                staff_loc = self._trainer.current_target_note.staff_loc
-                self._target_note_oval = self._canvas.create_oval(93, 106 - (5 * staff_loc),
-                                                                  107, 114 - (5 * staff_loc),
-                                                                  width=1, fill="green", outline="black")
-                self._canvas.delete(self._sharp_flat_symbol)
-                if len(self._trainer.current_target_note.name) > 1:
-                    symbol = self._trainer.current_target_note.name[1:]
-                    self._sharp_flat_symbol = self._canvas.create_text(90, 118 - (5 * staff_loc),
-                                                                       font=tkFont.Font(family='Helvetica',
-                                                                                        size=16),
-                                                                       anchor=Tkinter.SE, text=symbol)
+                self._status.itemconfig(self._status_txt1, text=txt1)
+                self._update_status_notes()
+
+                self._canvas.itemconfig(self._target_note_oval, width=1, fill="green")  # note is already in place
 
                 self._in_training = False
-                self._gui_top.after(1000, self._start_training)
-            else:
-                self._gui_top.after(50, self._check_note_practice_status)
-        # print "Exiting _check_note_practice_status"
+                self._pending_after = self._gui_top.after(1000, self._start_training)
+        # print "Exiting _on_note_complete"
+
+    def _update_status_notes(self):
+        """show the notes in play and in queue, the texts are only set again when the notes changed."""
+        on = self._note_names_on()
+        if on != self._last_on_str:
+            self._status.itemconfig(self._status_txt2, text="Notes in Play:\n" + on)
+            self._last_on_str = on
+        off = self._note_names_off()
+        if off != self._last_off_str:
+            self._status.itemconfig(self._status_txt3, text="Notes in Queue:\n" + off)
+            self._last_off_str = off
 
     def _on_set_topic(self, event):
-        # set a new topic
-        if event:
-            pass
-        value = self._training_topic_list.index(self._training_topic_list.curselection())
-        self._trainer.current_topic = value
+        # set a new topic, the selected line is the topic's index
+        selection = event.widget.curselection()
+        if selection:
+            self._trainer.current_topic = int(selection[0])  # older Tkinter versions hand back strings
 
     def _on_threshold_change(self):
-        self._trainer.threshold_multiplier = float(self._threshold_mult_spin.get())
+        self._trainer.threshold_multiplier = self._threshold_multiplier.get()
 
     def _on_note_method_change_all(self):
         self._trainer.add_notes_method = self._trainer.ADD_NOTES_ALL_AT_ONCE
@@ -809,28 +930,23 @@ class MainGUI(object):
 
     def _on_closing(self):
         # kill the application
-        self._trainer.kill_current_note_practice()  # used to kill the note capture thread.
+        self._trainer.on_complete = None  # a note heard from now on must not schedule work on the closed window
+        self._trainer.close()  # stops the note capture and the audio thread, which releases the audio device
+        if self._pending_after is not None:
+            self._gui_top.after_cancel(self._pending_after)
+            self._pending_after = None
         self._gui_top.destroy()
 
     def _on_add_notes_increment_change(self):
-        self._trainer.add_notes_increment = int(self._add_notes_increment_spin.get())
+        self._trainer.add_notes_increment = self._add_notes_increment.get()
 
     def _note_names_on(self):
-        str_notes = ""
-        for n in self._trainer.notes_in_play:
-            if len(str_notes) > 0:
-                str_notes += " "
-            str_notes += n.name
-        return str_notes
+        return " ".join(n.name for n in self._trainer.notes_in_play)
 
     def _note_names_off(self):
-        str_notes = ""
-        for n in self._trainer.notes_in_queue:
-            if len(str_notes) > 0:
-                str_notes += " "
-            str_notes += n.name
-        return str_notes
+        return " ".join(n.name for n in self._trainer.notes_in_queue)
 
 
 if __name__ == "__main__":
     gui = MainGUI()
+    gui.mainloop()
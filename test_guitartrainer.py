@@ -0,0 +1,93 @@
+import unittest
+
+import numpy as np
+
+import guitartrainer
+from guitartrainer import Note, NotePractice, Trainer, HOP_SIZE, SAMPLING_FREQ
+
+
+def _quiet_room(num_hops):
+    """low level noise, like a microphone in a quiet room"""
+    return np.random.RandomState(0).normal(0, 20, num_hops * HOP_SIZE)
+
+
+def _pluck(freq, onset, silent_hops=4, num_hops=14):
+    """a plucked string (a decaying note with its harmonics) starting `onset` samples into a hop after a few
+    silent hops"""
+    audio = np.zeros(num_hops * HOP_SIZE)
+    t = np.arange(len(audio) - silent_hops * HOP_SIZE - onset) / float(SAMPLING_FREQ)
+    audio[len(audio) - len(t):] = sum(np.sin(2 * np.pi * h * freq * t) / h for h in range(1, 7)) * np.exp(-t / 0.8)
+    return audio * 8000
+
+
+class _FakeStream(object):
+    """stands in for the pyaudio input stream, it goes inactive once all the audio was read"""
+
+    def __init__(self, audio):
+        self._audio = audio.astype(np.int16).tobytes()
+        self._pos = 0
+
+    def start_stream(self):
+        pass
+
+    def stop_stream(self):
+        pass
+
+    def close(self):
+        pass
+
+    def is_active(self):
+        return self._pos < len(self._audio)
+
+    def read(self, num_frames, exception_on_overflow=True):
+        data = self._audio[self._pos:self._pos + 2 * num_frames]
+        self._pos += 2 * num_frames
+        return data
+
+
+class _FakePyAudio(object):
+    stream = None
+
+    def open(self, **kwargs):
+        return _FakePyAudio.stream
+
+    def terminate(self):
+        pass
+
+
+class CaptureNoteTest(unittest.TestCase):
+    """runs the trainer's note capture on synthetic plucks at every eighth of a hop"""
+
+    def setUp(self):
+        self._pyaudio = guitartrainer.pyaudio.PyAudio
+        guitartrainer.pyaudio.PyAudio = _FakePyAudio
+        _FakePyAudio.stream = _FakeStream(np.zeros(0))
+        self._trainer = Trainer()
+        # listen to a quiet room first so the noise floor settles, the way it does before the first note is played
+        self._trainer._audio_stream = _FakeStream(_quiet_room(len(self._trainer._noise_levels)))
+        self._trainer._capture_note(NotePractice(Note(40, 'E', -5)))
+
+    def tearDown(self):
+        self._trainer.close()
+        guitartrainer.pyaudio.PyAudio = self._pyaudio
+
+    def _heard(self, played_midi, target_midi, onset):
+        self._trainer._audio_stream = _FakeStream(_pluck(Note.midi_to_freq(played_midi), onset))
+        note_practice = NotePractice(Note(target_midi, 'X', 0))
+        self._trainer._capture_note(note_practice)
+        return note_practice.complete
+
+    def test_played_note_is_heard(self):
+        for onset in range(0, HOP_SIZE, HOP_SIZE // 8):
+            self.assertTrue(self._heard(40, 40, onset), onset)
+            self.assertTrue(self._heard(59, 59, onset), onset)
+
+    def test_wrong_octave_onset_is_not_heard(self):
+        # the attack of a low E must not pass for its octave (E3) or its third harmonic (B3)
+        for onset in range(0, HOP_SIZE, HOP_SIZE // 8):
+            self.assertFalse(self._heard(40, 52, onset), onset)
+            self.assertFalse(self._heard(40, 59, onset), onset)
+
+
+if __name__ == '__main__':
+    unittest.main()